@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 import os, sys, asyncio, traceback, re, json
 from datetime import datetime, timezone, timedelta
+from contextlib import ExitStack
 from pathlib import Path
-from playwright.async_api import async_playwright, TimeoutError as PWTimeout
+import aiohttp
+from playwright.async_api import async_playwright, Error as PWError, TimeoutError as PWTimeout
+try:
+    import uvloop  # optional; POSIX only
+except ImportError:
+    uvloop = None
 
 # ---------- .env & paths ----------
 from dotenv import load_dotenv
@@ -11,15 +17,22 @@ load_dotenv(override=True)
 BASE = Path(__file__).resolve().parent
 OUT = BASE.parent / "out"
 OUT.mkdir(exist_ok=True)
+# Saved login (cookies + localStorage) so repeat runs can skip the login form
+SESSION_FILE = BASE.parent / ".pw-session.json"
+# Older snapshots are as good as expired; skip the probe navigation for them.
+# Above the daily cadence (plus slack for a late run), since every good run
+# re-saves the snapshot for the next day's
+SESSION_MAX_AGE_S = 36 * 3600
 
 DEBUG = os.getenv("DEBUG", "0") == "1"
 
 def log(msg: str):
     print(msg, flush=True)
 
+IST = timezone(timedelta(hours=5, minutes=30))
+
 def ist_today_str(fmt="%d-%m-%Y"):
-    ist = timezone(timedelta(hours=5, minutes=30))
-    return datetime.now(ist).strftime(fmt)
+    return datetime.now(IST).strftime(fmt)
 
 def require_env(name: str) -> str:
     val = os.getenv(name)
@@ -30,11 +43,31 @@ def require_env(name: str) -> str:
         )
     return val
 
-async def snap(page, name, full=False):
-    if not DEBUG: return
+# DEBUG screenshots run in the background; flush_snaps() before closing a context
+_snap_tasks = set()
+
+async def _shot(page, name, full):
     try: await page.screenshot(path=str(OUT / name), full_page=bool(full))
     except Exception: pass
 
+def snap(page, name, full=False):
+    if not DEBUG: return
+    t = asyncio.create_task(_shot(page, name, full))
+    _snap_tasks.add(t)
+    t.add_done_callback(_snap_tasks.discard)
+
+async def flush_snaps():
+    if _snap_tasks:
+        await asyncio.gather(*list(_snap_tasks), return_exceptions=True)
+
+async def snap_failure(page, tag):
+    # Not gated by DEBUG: a failed CI run should always leave a viewport shot
+    # plus the page HTML (cheaper than a full-page shot, and greppable)
+    try: await page.screenshot(path=str(OUT / f"{tag}.png"))
+    except Exception: pass
+    try: (OUT / f"{tag}.html").write_text(await page.content(), encoding="utf-8")
+    except Exception: pass
+
 
 # ---------- DOM helpers ----------
 async def get_text(node):
@@ -43,38 +76,34 @@ async def get_text(node):
     except Exception:
         return ""
 
-async def wait_for_any_selector(page, selectors, timeout=8000):
-    for sel in selectors:
-        try:
-            await page.locator(sel).first.wait_for(state="visible", timeout=timeout)
-            return sel
-        except Exception:
-            pass
-    return None
+async def _present(page, selectors):
+    """
+    Probes all candidates at once (one concurrent count() each) and returns
+    (probe, locator) for the ones on the page, in priority order. Each
+    candidate gets its own probe: joined into one selector they would rank
+    by document order instead.
+    """
+    locs = [page.locator(sel).first for sel in selectors]
+    counts = await asyncio.gather(*(loc.count() for loc in locs), return_exceptions=True)
+    return [(sel, loc) for sel, loc, n in zip(selectors, locs, counts) if isinstance(n, int) and n]
 
 async def click_first(page, selectors, timeout=6000, force=False):
-    for sel in selectors:
+    for sel, loc in await _present(page, selectors):
         try:
-            loc = page.locator(sel).first
-            if await loc.count():
-                await loc.scroll_into_view_if_needed()
-                await loc.click(timeout=timeout, force=force)
-                return True
+            # click() scrolls the target into view itself
+            await loc.click(timeout=timeout, force=force)
+            return True
         except Exception:
             pass
     return False
 
 async def fill_first(page, selectors, value, timeout=6000):
-    for sel in selectors:
+    for sel, loc in await _present(page, selectors):
         try:
-            loc = page.locator(sel).first
-            if await loc.count():
-                await loc.fill(value, timeout=timeout)
-                try:
-                    await page.eval_on_selector(sel, "el => {el.dispatchEvent(new Event('input',{bubbles:true})); el.dispatchEvent(new Event('change',{bubbles:true}));}")
-                except Exception:
-                    pass
-                return True
+            # fill() fires a real `input`; `change` follows natively when the
+            # next click blurs the field, so no extra dispatch round-trip
+            await loc.fill(value, timeout=timeout)
+            return True
         except Exception:
             pass
     return False
@@ -82,40 +111,100 @@ async def fill_first(page, selectors, value, timeout=6000):
 
 # ---------- Report page actions ----------
 REPORT_URL = "https://esinchai.punjab.gov.in/Authorities/applicationwisereport.jsp"
-
-async def goto_report_page(page):
-    # Direct jump (fastest & most reliable after login)
-    try:
-        await page.goto(REPORT_URL, wait_until="domcontentloaded", timeout=45000)
-    except Exception:
-        pass
+REPORT_FORM_READY_JS = """
+() => {
+  const shown = el => !!(el && el.offsetParent);
+  const want = /circle office|division office|nature of application|status|show report/i;
+  for (const el of document.querySelectorAll('label, button, input[type=button]')) {
+    if (want.test(el.textContent || el.value || '') && shown(el)) return true;
+  }
+  return shown(document.querySelector('#fromDate, #toDate'));
+}
+"""
+# Playwright search()es regex URL patterns, so no leading/trailing .* needed
+_APP_WISE_RE = re.compile(r"/Authorities/applicationwisereport\.jsp")
+
+async def goto_report_page(page, tag=""):
+    # Direct jump (fastest & most reliable after login); a page handed over
+    # from the session probe is already there
+    if not _APP_WISE_RE.search(page.url):
+        try:
+            await page.goto(REPORT_URL, wait_until="domcontentloaded", timeout=45000)
+        except Exception:
+            pass
 
     # If direct jump didn’t work, try menu path
-    if "applicationwisereport.jsp" not in page.url:
+    if not _APP_WISE_RE.search(page.url):
         log("[nav] Opening via menu…")
         await click_first(page, ["text=MIS Reports", "a:has-text('MIS Reports')", "nav >> text=MIS Reports"], timeout=6000)
-        await asyncio.sleep(0.2)
-        ok = await click_first(page, ["text=Application Wise Report", "a:has-text('Application Wise Report')"], timeout=6000)
-        if not ok:
-            raise RuntimeError("Could not open 'Application Wise Report' via menu")
+        # Wait for the submenu link itself instead of a fixed pause
         try:
-            await page.wait_for_url(re.compile(r".*/Authorities/applicationwisereport\.jsp.*"), timeout=20000)
+            await page.locator("a:has-text('Application Wise Report')").first.wait_for(state="visible", timeout=3000)
         except Exception:
             pass
+        ok = await click_first(page, ["text=Application Wise Report", "a:has-text('Application Wise Report')"], timeout=6000)
+        if not ok:
+            raise RuntimeError("Could not open 'Application Wise Report' via menu")
+        # Only the navigation itself; the form readiness wait below covers the
+        # rest (wait_for_url would otherwise hold out for the load event)
+        if not _APP_WISE_RE.search(page.url):
+            try:
+                await page.wait_for_url(_APP_WISE_RE, wait_until="domcontentloaded", timeout=20000)
+            except Exception:
+                pass
 
-    await page.wait_for_load_state("domcontentloaded")
-    # Wait for at least one control to show
-    await wait_for_any_selector(page, [
-        "label:has-text('Circle Office')",
-        "label:has-text('Division Office')",
-        "label:has-text('Nature Of Application')",
-        "label:has-text('Status')",
-        "text=Show Report",
-        "input#fromDate", "input#toDate"
-    ], timeout=10000)
+    # Wait for at least one control to show (the thing we touch next, not a load state).
+    # One in-page check over labels/inputs instead of trying each selector in
+    # turn, where a missing first candidate cost its full timeout
+    try:
+        await page.wait_for_function("() => window.__drp.reportFormReady()", timeout=10000)
+    except Exception:
+        pass
     log("[nav] Application Wise Report page ready.")
-    await snap(page, "after_open_app_wise.png")
-
+    snap(page, f"after_open_app_wise{tag}.png")
+
+
+def _label_selectors(label_text):
+    anchor = f"//label[contains(normalize-space(), \"{label_text}\")]"
+    return {
+        "select": f"xpath=({anchor}/following::select[1])[1]",
+        "bootstrap": f"xpath=({anchor}/following::*[contains(@class,'bootstrap-select')][1]//button[contains(@class,'dropdown-toggle')])[1]",
+        "input": f"xpath=({anchor}/following::input[1])[1]",
+    }
+
+# Built once at import for the labels the report page actually uses
+_LABEL_SELECTORS = {
+    label: _label_selectors(label)
+    for label in ("Circle Office", "Division Office", "Nature Of Application", "Status")
+}
+
+# Fallbacks by known ids / names, keyed by a word in the label
+_FALLBACK_CONTROLS = (
+    ("circle",   "select", "select#circle, select#circleId, select[name='circle'], select[name*='circle']"),
+    ("division", "select", "select#division, select#divisionId, select[name='division'], select[name*='division']"),
+    ("status",   "select", "select#status, select#statusId, select[name='status'], select[name*='status']"),
+    # multi-select
+    ("nature",   "select", "label:has-text('Nature Of Application') ~ select, select[name*='nature']"),
+    ("from",     "input",  "#fromDate, input#fromDate, input[name='fromDate'], input[name*='fromdate' i], input[placeholder*='From' i]"),
+    ("to",       "input",  "#toDate, input#toDate, input[name='toDate'], input[name*='todate' i], input[placeholder*='To' i]"),
+)
+
+
+CONTROL_KIND_JS = """
+(label) => {
+  const has = (xp) => !!document.evaluate(xp, label, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+  // Prefer sibling select, then a bootstrap-select toggle, then any input (dates)
+  if (has("following::select[1]")) return 'select';
+  if (has("following::*[contains(@class,'bootstrap-select')][1]//button[contains(@class,'dropdown-toggle')]")) return 'bootstrap';
+  if (has("following::input[1]")) return 'input';
+  return null;
+}
+"""
+
+
+# label_text -> resolved control info. The report page has the same layout
+# for every run, so only the first lookup per label goes to the page
+_CONTROL_CACHE = {}
 
 async def _find_control_near_label(page, label_text):
     """
@@ -124,50 +213,79 @@ async def _find_control_near_label(page, label_text):
       handle: selector string for primary control (select/input/button)
       root: container selector for this section
     """
-    # Find the label
-    label = page.locator(f"label:has-text('{label_text}')").first
-    if not await label.count():
-        # Try contains (case-insensitive) via xpath
-        label = page.locator(f"xpath=//label[contains(translate(normalize-space(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), '{label_text.lower()}')]").first
-        if not await label.count():
-            return {"kind": None, "handle": None, "root": None}
-
-    # Prefer sibling select
-    # 1) Direct select after label
-    sib_select = label.locator("xpath=following::select[1]").first
-    if await sib_select.count():
-        return {"kind": "select", "handle": "xpath=(" + await sib_select.evaluate("e => e.outerHTML") + ")", "root": None}
-
-    # 2) Bootstrap-select pattern: a div with .bootstrap-select and a button.dropdown-toggle
-    #    Try label's next container
-    bs_button = label.locator("xpath=following::*[contains(@class,'bootstrap-select')][1]//button[contains(@class,'dropdown-toggle')]").first
-    if await bs_button.count():
-        return {"kind": "bootstrap", "handle": "xpath=(//label[contains(normalize-space(), \"" + label_text + "\")]/following::*[contains(@class,'bootstrap-select')][1]//button[contains(@class,'dropdown-toggle')])[1]", "root": None}
-
-    # 3) Any input (for dates)
-    date_input = label.locator("xpath=following::input[1]").first
-    if await date_input.count():
-        return {"kind": "input", "handle": "xpath=(//label[contains(normalize-space(), \"" + label_text + "\")]/following::input[1])[1]", "root": None}
-
-    # Fallbacks by known ids / names
+    cached = _CONTROL_CACHE.get(label_text)
+    if cached:
+        return cached
+
+    sels = _LABEL_SELECTORS.get(label_text) or _label_selectors(label_text)
+
+    # Find the label (case-insensitive contains) and classify what follows it
+    # in one evaluate: false = no such label, null = label but no known control
+    try:
+        kind = await page.evaluate("(t) => window.__drp.kindNear(t)", label_text)
+    except Exception:
+        kind = None
+    if kind is False:
+        return {"kind": None, "handle": None, "root": None}
+    if kind:
+        info = {"kind": kind, "handle": sels[kind], "root": None}
+        _CONTROL_CACHE[label_text] = info
+        return info
+
     low = label_text.lower()
-    if "circle" in low:
-        return {"kind": "select", "handle": "select#circle, select#circleId, select[name='circle'], select[name*='circle']", "root": None}
-    if "division" in low:
-        return {"kind": "select", "handle": "select#division, select#divisionId, select[name='division'], select[name*='division']", "root": None}
-    if "status" in low:
-        return {"kind": "select", "handle": "select#status, select#statusId, select[name='status'], select[name*='status']", "root": None}
-    if "nature" in low:
-        # multi-select
-        return {"kind": "select", "handle": "label:has-text('Nature Of Application') ~ select, select[name*='nature']", "root": None}
-    if "from" in low:
-        return {"kind": "input", "handle": "#fromDate, input#fromDate, input[name='fromDate'], input[name*='fromdate' i], input[placeholder*='From' i]", "root": None}
-    if "to" in low:
-        return {"kind": "input", "handle": "#toDate, input#toDate, input[name='toDate'], input[name*='todate' i], input[placeholder*='To' i]", "root": None}
+    for word, kind, handle in _FALLBACK_CONTROLS:
+        if word in low:
+            return {"kind": kind, "handle": handle, "root": None}
 
     return {"kind": None, "handle": None, "root": None}
 
 
+BS_PICK_JS = """
+(menu, txt) => {
+  const target = (txt||'').trim().toLowerCase();
+  const hit = Array.from(menu.querySelectorAll('li a, .dropdown-item'))
+    .find(e => (e.textContent||'').trim().toLowerCase().includes(target));
+  if (!hit) return false;
+  hit.click();
+  return true;
+}
+"""
+
+BS_PICK_ALL_JS = """
+(menu) => {
+  const all = Array.from(menu.querySelectorAll('button, a, li, .text'))
+    .find(e => /^select all$/i.test((e.textContent||'').trim()));
+  if (all) { all.click(); return true; }
+  let n = 0;
+  for (const li of menu.querySelectorAll('li')) {
+    if (li.classList.contains('selected') || li.classList.contains('disabled')) continue;
+    const a = li.querySelector('a, .dropdown-item') || li;
+    a.click();
+    n++;
+  }
+  return n > 0;
+}
+"""
+
+# Same as BS_PICK_JS, starting from the toggle button without opening the menu
+BS_PICK_CLOSED_JS = """
+(toggle, txt) => {
+  const box = toggle.closest('.bootstrap-select, .dropdown, .btn-group');
+  const menu = box && box.querySelector('.dropdown-menu');
+  return !!menu && window.__drp.bsPick(menu, txt);
+}
+"""
+
+async def _open_bs_menu(page, toggle):
+    """
+    Clicks a bootstrap-select toggle and returns the menu once it is open.
+    """
+    await page.locator(toggle).click(timeout=6000)
+    menu = page.locator(".dropdown-menu.show, .show .dropdown-menu").first
+    await menu.wait_for(timeout=6000)
+    return menu
+
+
 async def set_select_by_label(page, label_text: str, wanted_text: str) -> bool:
     """
     Works with native <select> and bootstrap-select dropdowns.
@@ -178,69 +296,36 @@ async def set_select_by_label(page, label_text: str, wanted_text: str) -> bool:
         return False
 
     if kind == "select":
-        # Native <select>
-        try:
-            # Prefer label match
-            await page.select_option(handle, label=wanted_text)
-            return True
-        except Exception:
-            try:
-                await page.select_option(handle, value=wanted_text)
-                return True
-            except Exception:
-                pass
-        # Try contains match via JS
+        # Native <select>: exact text, then value, then contains — in one call
         try:
-            js = """
-            (sel, txt) => {
-              const el = document.querySelector(sel);
-              if (!el) return false;
-              const target = (txt||'').trim().toLowerCase();
-              let idx = -1;
-              for (let i=0;i<el.options.length;i++){
-                const t = (el.options[i].text || '').trim().toLowerCase();
-                if (t.includes(target)){ idx = i; break; }
-              }
-              if (idx === -1) return false;
-              el.selectedIndex = idx;
-              el.dispatchEvent(new Event('input',{bubbles:true}));
-              el.dispatchEvent(new Event('change',{bubbles:true}));
-              return true;
-            }
-            """
-            ok = await page.evaluate(js, handle, wanted_text)
+            ok = await page.evaluate("([l, t, css]) => window.__drp.selectByText(l, t, css)", [label_text, wanted_text, handle])
             return bool(ok)
         except Exception:
+            _CONTROL_CACHE.pop(label_text, None)
             return False
 
     if kind == "bootstrap":
+        # One-shot: click the matching item in the toggle's (still closed)
+        # menu; item handlers fire on hidden elements too
+        try:
+            if await page.locator(handle).first.evaluate("(b, t) => window.__drp.bsPickClosed(b, t)", wanted_text):
+                return True
+        except Exception:
+            pass
         try:
-            # Open menu
-            await page.locator(handle).click(timeout=6000)
-            # Find any menu item containing wanted text
-            menu = page.locator(".dropdown-menu.show, .show .dropdown-menu").first
-            await menu.wait_for(timeout=6000)
-            item = menu.locator("li, a, span, .text").filter(has_text=wanted_text).first
-            if not await item.count():
-                # Attempt to scroll & find
-                found = False
-                for _ in range(20):
-                    if await menu.locator("li, a, span, .text").filter(has_text=wanted_text).count():
-                        found = True
-                        break
-                    try:
-                        await menu.evaluate("(m)=>m.scrollBy(0,250)")
-                    except Exception:
-                        pass
-                    await asyncio.sleep(0.05)
-                if not found:
-                    # close
+            menu = await _open_bs_menu(page, handle)
+            # Fast path: find + click the matching item in one round-trip
+            clicked = await menu.evaluate("(m, t) => window.__drp.bsPick(m, t)", wanted_text)
+            if not clicked:
+                # Find any menu item containing wanted text
+                item = menu.locator("li, a, span, .text").filter(has_text=wanted_text).first
+                if not await item.count():
+                    # Options are all in the DOM already; click() scrolls the match
+                    # into view itself, so a miss here is a real miss
                     try: await page.keyboard.press("Escape")
                     except Exception: pass
                     return False
-                item = menu.locator("li, a, span, .text").filter(has_text=wanted_text).first
-
-            await item.click(timeout=6000)
+                await item.click(timeout=6000)
             # Close the open dropdown (the site leaves it open)
             try: await page.keyboard.press("Escape")
             except Exception: pass
@@ -248,6 +333,7 @@ async def set_select_by_label(page, label_text: str, wanted_text: str) -> bool:
             except Exception: pass
             return True
         except Exception:
+            _CONTROL_CACHE.pop(label_text, None)
             try: await page.keyboard.press("Escape")
             except Exception: pass
             return False
@@ -265,58 +351,24 @@ async def select_nature_all(page) -> bool:
 
     if info["kind"] == "select":
         try:
-            js = """
-            (sel) => {
-              const el = document.querySelector(sel);
-              if (!el) return false;
-              if (!el.options || el.options.length === 0) return false;
-              let changed = false;
-              for (const o of el.options) { if (!o.selected) { o.selected = true; changed = true; } }
-              if (changed) {
-                el.dispatchEvent(new Event('input',{bubbles:true}));
-                el.dispatchEvent(new Event('change',{bubbles:true}));
-              }
-              return true;
-            }
-            """
-            ok = await page.evaluate(js, info["handle"])
+            ok = await page.evaluate("([l, css]) => window.__drp.selectAll(l, css)", ["Nature Of Application", info["handle"]])
             return bool(ok)
         except Exception:
-            pass
+            _CONTROL_CACHE.pop("Nature Of Application", None)
 
     if info["kind"] == "bootstrap":
         try:
-            await page.locator(info["handle"]).click(timeout=6000)
-            menu = page.locator(".dropdown-menu.show, .show .dropdown-menu").first
-            await menu.wait_for(timeout=6000)
-            # click "Select All" if present; otherwise click every option
-            sel_all = menu.locator("text=Select All, text=Select all, text=Select All ").first
-            if await sel_all.count():
-                await sel_all.click(timeout=4000)
-            else:
-                items = menu.locator("li a, .dropdown-item, .text").all()
-                for _ in range(30):
-                    try:
-                        await menu.evaluate("(m)=>m.scrollBy(0,400)")
-                    except Exception:
-                        pass
-                    await asyncio.sleep(0.05)
-                # attempt clicking all visible options
-                try:
-                    count = await menu.locator("li a, .dropdown-item, .text").count()
-                    for i in range(count):
-                        try:
-                            await menu.locator("li a, .dropdown-item, .text").nth(i).click(timeout=1500)
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
+            menu = await _open_bs_menu(page, info["handle"])
+            # click "Select All" if present; otherwise every unselected option,
+            # all in one pass inside the page
+            await menu.evaluate("(m) => window.__drp.bsPickAll(m)")
             try: await page.keyboard.press("Escape")
             except Exception: pass
             try: await page.mouse.click(10,10)
             except Exception: pass
             return True
         except Exception:
+            _CONTROL_CACHE.pop("Nature Of Application", None)
             try: await page.keyboard.press("Escape")
             except Exception: pass
             return False
@@ -324,67 +376,395 @@ async def select_nature_all(page) -> bool:
     return False
 
 
+FROM_DATE_SELECTORS = [
+    "#fromDate", "input#fromDate", "input[name='fromDate']",
+    "input[name*='fromdate' i]", "input[placeholder*='From' i]",
+]
+TO_DATE_SELECTORS = [
+    "#toDate", "input#toDate", "input[name='toDate']",
+    "input[name*='todate' i]", "input[placeholder*='To' i]",
+]
+
 async def set_date_inputs(page, from_str: str, to_str: str) -> bool:
-    okF = await fill_first(page, [
-        "#fromDate", "input#fromDate", "input[name='fromDate']",
-        "input[name*='fromdate' i]", "input[placeholder*='From' i]",
-    ], from_str)
-    okT = await fill_first(page, [
-        "#toDate", "input#toDate", "input[name='toDate']",
-        "input[name*='todate' i]", "input[placeholder*='To' i]",
-    ], to_str)
+    okF = await fill_first(page, FROM_DATE_SELECTORS, from_str)
+    okT = await fill_first(page, TO_DATE_SELECTORS, to_str)
     return okF and okT
 
 
-async def click_show_report_and_wait(page) -> bool:
-    await click_first(page, [
-        "button:has-text('Show Report')",
-        "input[type='button'][value='Show Report']",
-        "text=Show Report"
-    ], timeout=8000)
-    # Wait for table-like content
+# Shared by the page helpers below (they are spliced into one closure in
+# PAGE_HELPERS_JS). The label index is built lazily and dropped whenever the
+# DOM changes, so repeated lookups don't rescan every <label>.
+LABEL_INDEX_JS = """
+  const norm = s => (s||'').replace(/\\s+/g,' ').trim().toLowerCase();
+  // Observe only while an index is cached: the first change drops it and
+  // stops observing, so idle pages (login, PDF frame) pay nothing
+  let labels = null, selects = null, mo = null;
+  const watch = () => {
+    if (mo) return;
+    mo = new MutationObserver(() => { labels = null; selects = null; mo.disconnect(); mo = null; });
+    mo.observe(document, {childList: true, subtree: true});
+  };
+  const labelFor = (text) => {
+    if (!labels) { labels = Array.from(document.querySelectorAll('label'), l => [norm(l.textContent), l]); watch(); }
+    const want = norm(text);
+    const hit = labels.find(([t]) => t.includes(want));
+    return hit ? hit[1] : null;
+  };
+  // Falls back to a plain CSS selector (the id/name guesses) when no label matches
+  const selectNear = (text, css) => {
+    const lab = labelFor(text);
+    if (lab) {
+      if (lab.htmlFor) {
+        const el = document.getElementById(lab.htmlFor);
+        if (el && el.tagName === 'SELECT') return el;
+      }
+      if (!selects) { selects = Array.from(document.querySelectorAll('select')); watch(); }
+      const s = selects.find(s => lab.compareDocumentPosition(s) & Node.DOCUMENT_POSITION_FOLLOWING);
+      if (s) return s;
+    }
+    if (css && !css.startsWith('xpath=')) {
+      try { return document.querySelector(css); } catch (e) {}
+    }
+    return null;
+  };
+  // Tags the current options of the select near `label`, so a wait can tell
+  // a reloaded list (new option nodes) from the old one
+  const markOptions = (label) => {
+    const s = selectNear(label);
+    if (s) for (const o of s.options) o.__drpOld = true;
+    return !!s;
+  };
+  const fire = (el) => {
+    el.dispatchEvent(new Event('input',{bubbles:true}));
+    el.dispatchEvent(new Event('change',{bubbles:true}));
+    // Keep a bootstrap-select wrapper in sync with its hidden <select>
+    if (el.tagName === 'SELECT' && window.jQuery && window.jQuery.fn.selectpicker) {
+      try { window.jQuery(el).selectpicker('refresh'); } catch (e) {}
+    }
+  };
+  // `always`: fire `change` even if `wanted` is already selected
+  const pickOption = (sel, wanted, always) => {
+    // One pass over the options: exact text wins, then value, then contains
+    const w = norm(wanted);
+    let byValue = -1, byPart = -1, idx = -1;
+    for (let i = 0, opts = sel.options, n = opts.length; i < n; i++) {
+      const t = norm(opts[i].textContent);
+      if (t === w) { idx = i; break; }
+      if (byValue === -1 && opts[i].value === wanted) byValue = i;
+      if (byPart === -1 && t.includes(w)) byPart = i;
+    }
+    if (idx === -1) idx = byValue !== -1 ? byValue : byPart;
+    if (idx === -1) return false;
+    // Already selected: skip the change cascade (AJAX reloads, widget redraw),
+    // except on a cascade parent: a value pre-selected by the server (Circle
+    // from the officer's profile) never ran the site's loader for its
+    // dependants
+    if (sel.selectedIndex === idx && !always) return true;
+    sel.selectedIndex = idx;
+    fire(sel);
+    return true;
+  };
+  const selectAllOptions = (sel) => {
+    if (!sel.multiple || !sel.options.length) return false;
+    let changed = false;
+    for (const o of sel.options) { if (!o.selected) { o.selected = true; changed = true; } }
+    if (changed) fire(sel);
+    return true;
+  };
+"""
+
+FILTERS_JS = """
+(ops) => {
+  // Candidates in priority order (not document order), and only elements of
+  // the right type: '#login' may well be the <form>, not the field
+  const first = (sels, ok) => {
+    for (const s of sels) {
+      for (const el of document.querySelectorAll(s)) if (ok(el)) return el;
+    }
+    return null;
+  };
+  const isSelect = (el) => el instanceof HTMLSelectElement;
+  const isField = (el) => el instanceof HTMLInputElement || el instanceof HTMLTextAreaElement;
+  return ops.map(op => {
+    if (op.kind === 'select') {
+      const s = op.selectors ? first(op.selectors, isSelect) : selectNear(op.label);
+      return !!s && pickOption(s, op.wanted, op.cascade);
+    }
+    if (op.kind === 'selectAll') {
+      const s = selectNear(op.label);
+      return !!s && selectAllOptions(s);
+    }
+    if (op.kind === 'input') {
+      const el = first(op.selectors, isField);
+      if (!el) return false;
+      if (el.value !== op.value) { el.value = op.value; fire(el); }
+      // Read back after the events: datepickers may reformat or reject it
+      return el.value || false;
+    }
+    return false;
+  });
+}
+"""
+
+async def apply_filters(page, ops):
+    """
+    Applies a batch of native filter ops in one round-trip.
+    Returns one result per op (falsy on a miss; input ops return the value the
+    field holds afterwards); callers fall back to the per-control helpers.
+    """
     try:
-        await page.wait_for_selector("table, .table, .dataTable", state="visible", timeout=30000)
+        return await page.evaluate("(ops) => window.__drp.filters(ops)", ops)
     except Exception:
-        pass
+        return [False] * len(ops)
+
+
+EMPTY_MSG_JS = """
+(text) => /no\\s+(records?|data)|records?\\s+not\\s+found/i.test(text || '')
+"""
+
+REPORT_STATE_JS = """
+(scoped) => {
+  // Walk siblings directly (no intermediate arrays) and stop at the first
+  // row with two non-empty cells. Rows armReport() found already on the page
+  // (layout tables, a previous report) are not the answer
+  for (const tb of document.querySelectorAll('table tbody')) {
+    for (let tr = tb.firstElementChild; tr; tr = tr.nextElementSibling) {
+      if (tr.__drpOld) continue;
+      let n = 0;
+      for (let td = tr.firstElementChild; td; td = td.nextElementSibling) {
+        if (td.tagName === 'TD' && td.textContent.trim() && ++n >= 2) return 'rows';
+      }
+    }
+  }
+  // A "no records" message only counts inside the grid / message boxes, not
+  // anywhere in the body text (help text, hidden templates)
+  if (scoped) {
+    for (const el of document.querySelectorAll("table, .dataTables_empty, .alert, .message, .msg, .error, [id*='msg' i], [class*='empty' i]")) {
+      if (window.__drp.emptyMsg(el.textContent)) return 'empty';
+    }
+  }
+  return false;
+}
+"""
+
+# Armed right before Show Report is clicked: tags the table rows already on
+# the page so only rows the click brings count, and records whether the DOM
+# changes since include a "no records" message, so a placeholder that was
+# already on the page (DataTables' "No data available in table") can't
+# resolve the wait. A message added after the click can still be a
+# client-side redraw ahead of the XHR; the caller confirms 'empty' once the
+# network is quiet.
+ARM_REPORT_JS = """
+() => {
+  if (window.__drpReportMo) window.__drpReportMo.disconnect();
+  for (const tr of document.querySelectorAll('table tbody tr')) tr.__drpOld = true;
+  const st = window.__drpReport = {sawEmpty: false};
+  const mo = window.__drpReportMo = new MutationObserver((recs) => {
+    for (const r of recs) {
+      if (r.type === 'characterData') {
+        if (window.__drp.emptyMsg(r.target.data)) st.sawEmpty = true;
+        continue;
+      }
+      for (const n of r.addedNodes) if (window.__drp.emptyMsg(n.textContent)) st.sawEmpty = true;
+    }
+    if (st.sawEmpty) mo.disconnect();
+  });
+  mo.observe(document, {childList: true, subtree: true, characterData: true});
+  return true;
+}
+"""
+
+# Resolves 'rows' / 'empty' once the report looks answered, or false after
+# `ms`; 'empty' is only provisional (see ARM_REPORT_JS).
+# Re-checks only when the DOM changes (coalesced to one check per 50 ms).
+# `fresh`: the page navigated after the click, so this whole document is the
+# answer and a message in the grid area counts as it stands. A document that
+# was never armed must be such a post-click navigation too.
+WAIT_REPORT_JS = """
+([ms, fresh]) => new Promise(resolve => {
+  const st = window.__drpReport;
+  fresh = fresh || !st;
+  let done = false, queued = false, mo = null, timer = null;
+  const finish = (v) => {
+    if (done) return;
+    done = true;
+    if (mo) mo.disconnect();
+    if (window.__drpReportMo) window.__drpReportMo.disconnect();
+    clearTimeout(timer);
+    resolve(v);
+  };
+  const check = () => {
+    queued = false;
+    const v = window.__drp.reportState(fresh);
+    if (v) finish(v);
+    else if (st && st.sawEmpty) finish('empty');
+  };
+  check();
+  if (done) return;
+  mo = new MutationObserver(() => { if (!queued) { queued = true; setTimeout(check, 50); } });
+  mo.observe(document, {childList: true, subtree: true, characterData: true});
+  timer = setTimeout(() => finish(false), ms);
+})
+"""
+
+# Resolves once no table rows/cells were added or removed for `quiet` ms
+# (or after `max` ms regardless)
+WAIT_QUIET_JS = """
+([quiet, max]) => new Promise(resolve => {
+  let timer = null;
+  const done = () => { mo.disconnect(); clearTimeout(timer); clearTimeout(cap); resolve(); };
+  const mo = new MutationObserver(() => { clearTimeout(timer); timer = setTimeout(done, quiet); });
+  for (const t of document.querySelectorAll('table')) mo.observe(t, {childList: true, subtree: true});
+  timer = setTimeout(done, quiet);
+  const cap = setTimeout(done, max);
+})
+"""
+
+def watch_network(page, quiet_ms=500):
+    """
+    Starts counting the page's in-flight requests. Returns an async
+    wait(timeout_ms) that resolves once nothing has been in flight for
+    quiet_ms (True) or the timeout hits (False), then stops watching.
+    """
+    loop = asyncio.get_running_loop()
+    inflight = set()
+    quiet = asyncio.Event()
+    timer = None
+
+    def arm():
+        nonlocal timer
+        if timer: timer.cancel()
+        quiet.clear()
+        if not inflight:
+            timer = loop.call_later(quiet_ms / 1000, quiet.set)
+
+    def on_request(req):
+        inflight.add(req); arm()
+
+    def on_done(req):
+        inflight.discard(req); arm()
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+    arm()
+
+    async def wait(timeout_ms=10000):
+        try:
+            await asyncio.wait_for(quiet.wait(), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if timer: timer.cancel()
+            page.remove_listener("request", on_request)
+            page.remove_listener("requestfinished", on_done)
+            page.remove_listener("requestfailed", on_done)
+        return quiet.is_set()
+
+    return wait
+
 
-    # Verify rows
+SHOW_REPORT_SELECTORS = [
+    "button:has-text('Show Report')",
+    "input[type='button'][value='Show Report']",
+    "text='Show Report'",
+]
+
+async def click_show_report_and_wait(page) -> bool:
+    net_quiet = watch_network(page)
     try:
-        has_rows = await page.evaluate("""
-            () => {
-              const tbodies = Array.from(document.querySelectorAll('table tbody'));
-              for (const tb of tbodies) {
-                const trs = Array.from(tb.querySelectorAll('tr'));
-                for (const tr of trs) {
-                  const tds = Array.from(tr.querySelectorAll('td')).map(td => (td.innerText||'').trim());
-                  if (tds.filter(Boolean).length >= 2) return true;
-                }
-              }
-              return false;
-            }
-        """)
-        return bool(has_rows)
+        await page.evaluate("() => window.__drp.armReport()")
     except Exception:
+        pass
+    # Candidates in priority order (probed concurrently): a hidden or earlier
+    # node with the same text must not win over the real button
+    if not await click_first(page, SHOW_REPORT_SELECTORS, timeout=8000):
+        log("[show] Could not click Show Report.")
+        await net_quiet(timeout_ms=0)
         return False
-
+    # One browser-side wait covers both outcomes: data rows, or the site's
+    # "No records" message (the wait runs in the page, not over CDP)
+    # Event-driven: the page re-checks on DOM mutations, no fixed tick. If
+    # Show Report submits the form, the navigation kills the pending
+    # promise; pick the wait up again on the new document for the time left
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + 30
+    state = False
+    for attempt in range(2):
+        try:
+            ms = max(0, int((deadline - loop.time()) * 1000))
+            state = await page.evaluate("(a) => window.__drp.waitReport(a)", [ms, attempt > 0])
+            break
+        except Exception:
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=max(1, (deadline - loop.time()) * 1000))
+            except Exception:
+                break
+    if state == "empty":
+        # The message may be a client-side redraw ahead of the XHR: trust it
+        # only once the requests have finished and brought no new rows
+        ms = max(0, int((deadline - loop.time()) * 1000))
+        answered = await net_quiet(timeout_ms=ms)
+        try:
+            state = await page.evaluate("() => window.__drp.reportState(true)")
+        except Exception:
+            state = False
+        if state != "rows":
+            state = "empty" if answered else False
+    has_rows = state == "rows"
+    # First rows can land before paging/summary XHRs finish; print only once
+    # the page has gone quiet, whatever the URLs are, and the grid has
+    # stopped redrawing (client-side paging/sorting after the last XHR).
+    # Both waits run side by side. With no rows there is nothing left to
+    # settle, so just drop the listeners
+    if has_rows:
+        async def grid_quiet():
+            try:
+                await page.evaluate("(a) => window.__drp.waitQuiet(a)", [300, 3000])
+            except Exception:
+                pass
+        await asyncio.gather(net_quiet(timeout_ms=10000), grid_quiet())
+    else:
+        await net_quiet(timeout_ms=0)
+    return has_rows
+
+
+EXTRACT_TABLES_JS = """
+() => {
+  const out = [];
+  for (const t of document.querySelectorAll('table')) {
+    // Skip nav/menus if obvious
+    if (t.closest("nav, header, footer, [role='navigation'], .navbar, .sidebar, .breadcrumbs")) continue;
+    // only keep if there are data rows: stop at the first row with two
+    // non-empty cells (textContent, no per-cell layout like innerText)
+    let has = false;
+    rows: for (const tb of t.tBodies) {
+      for (const r of tb.rows) {
+        let n = 0;
+        for (const td of r.cells) {
+          if (td.tagName === 'TD' && td.textContent.trim() && ++n >= 2) { has = true; break rows; }
+        }
+      }
+    }
+    if (!has) continue;
+    const clone = t.cloneNode(true);
+    // Strip inline widths and scripts
+    clone.querySelectorAll('*').forEach(el => el.removeAttribute('width'));
+    clone.querySelectorAll('script').forEach(s => s.remove());
+    out.push(clone.outerHTML);
+  }
+  return out;
+}
+"""
 
 async def render_current_panel_to_pdf(context, page, save_path: Path, title: str, filters_text: str):
     """
     Takes the visible report table (and header info) and renders a clean PDF.
     """
-    html = await page.evaluate("""
-        () => {
-          const clone = document.documentElement.cloneNode(true);
-          // Try to isolate the central report panel if possible
-          // Keep all tables
-          // Remove nav/menus if obvious
-          const rmBySel = sel => clone.querySelectorAll(sel).forEach(el => el.remove());
-          rmBySel("nav, header, footer, [role='navigation'], .navbar, .sidebar, .breadcrumbs");
-          // Remove scripts
-          clone.querySelectorAll("script").forEach(s => s.remove());
-          return "<!doctype html>" + clone.outerHTML;
-        }
-    """)
+    # Pull only the data tables out of the live page; cloning and re-parsing
+    # the whole document was most of the cost (and broke on `${` in cells)
+    tables = await page.evaluate("() => window.__drp.extractTables()")
+    content = '\n  <div class="spacer"></div>\n'.join(tables) if tables else "<p>No rows found.</p>"
     # Build a minimal printable frame around the table content
     # (We’ll not rely on site CSS; add simple table borders for clarity)
     skeleton = f"""<!doctype html>
@@ -400,84 +780,173 @@ async def render_current_panel_to_pdf(context, page, save_path: Path, title: str
   table {{ border-collapse: collapse; width: 100%; }}
   th, td {{ border: 1px solid #888; padding: 6px 8px; vertical-align: top; }}
   thead th {{ background: #eee; }}
+  .spacer {{ height: 12px; }}
 </style>
 </head>
 <body>
   <h1>{title}</h1>
   <div class="meta">{filters_text}</div>
   <div id="content">
-    <!-- We will inject extracted tables only to avoid nav detritus -->
+  {content}
   </div>
-  <script>
-    (function() {{
-      const src = document.createElement('html');
-      src.innerHTML = `{html.replace("`", "\\`")}`;
-      const tables = src.querySelectorAll('table');
-      const content = document.getElementById('content');
-      if (tables.length === 0) {{
-        const p = document.createElement('p');
-        p.textContent = "No rows found.";
-        content.appendChild(p);
-      }} else {{
-        tables.forEach(t => {{
-          // only keep if there are data rows
-          const rows = Array.from(t.querySelectorAll('tbody tr'));
-          const has = rows.some(r => Array.from(r.querySelectorAll('td')).filter(td => (td.innerText||'').trim()).length >= 2);
-          if (has) {{
-            const clone = t.cloneNode(true);
-            // Strip inline widths
-            clone.querySelectorAll('*').forEach(el => el.removeAttribute('width'));
-            content.appendChild(clone);
-            const spacer = document.createElement('div');
-            spacer.style.height = '12px';
-            content.appendChild(spacer);
-          }}
-        }});
-      }}
-    }})();
-  </script>
 </body>
 </html>"""
 
     pdf_page = await context.new_page()
-    await pdf_page.set_content(skeleton, wait_until="load")
-    await pdf_page.emulate_media(media="screen")
+    # No emulate_media: the skeleton has no media-specific CSS, so screen vs
+    # print makes no difference and the extra style recalc is wasted
+    # The site's table HTML goes in verbatim, <img> (status icons) included,
+    # and nothing blocks those on this page: wait for them before printing
+    await pdf_page.set_content(skeleton, wait_until="load", timeout=30000)
     await pdf_page.pdf(path=str(save_path), format="A4", landscape=True, print_background=True, margin={"top":"12mm","right":"12mm","bottom":"12mm","left":"12mm"})
     await pdf_page.close()
     log(f"[pdf] rendered → {save_path}")
 
 
 # ---------- Main flow ----------
+OPTION_PRESENT_JS = """
+(txt) => {
+  const target = (txt||'').trim().toLowerCase();
+  for (const o of document.querySelectorAll('select option, .dropdown-menu li')) {
+    if (o.textContent.toLowerCase().includes(target)) return true;
+  }
+  return false;
+}
+"""
+
+# Resolves true as soon as an option containing `txt` is there, false after
+# `ms`. With `child` (a label), only the select near it counts, and only once
+# it holds options added since markOptions(child): i.e. after its reload, not
+# a stale list that happens to contain the text already.
+WAIT_OPTION_JS = """
+([txt, ms, child]) => new Promise(resolve => {
+  const ready = () => {
+    if (!child) return window.__drp.optionPresent(txt);
+    const s = selectNear(child);
+    if (!s) return false;
+    const target = norm(txt);
+    let reloaded = false, hit = false;
+    for (const o of s.options) {
+      if (!o.__drpOld) reloaded = true;
+      if (norm(o.textContent).includes(target)) hit = true;
+    }
+    return reloaded && hit;
+  };
+  if (ready()) return resolve(true);
+  // Options only ever arrive as added nodes; skip the rescan for other changes
+  const mo = new MutationObserver((recs) => {
+    if (!recs.some(r => r.addedNodes.length)) return;
+    if (ready()) { mo.disconnect(); clearTimeout(timer); resolve(true); }
+  });
+  mo.observe(document, {childList: true, subtree: true});
+  const timer = setTimeout(() => { mo.disconnect(); resolve(false); }, ms);
+})
+"""
+
+# Applies `ops`, one of which sets the `parent` select. That op always fires
+# `change` (even when the value is already selected), so the site reloads the
+# `child` list: wait for the reloaded list to include `txt`. If the parent
+# wasn't set, just wait for `txt` itself. Resolves [op results, found].
+CASCADE_JS = """
+async ([ops, parent, child, txt, ms]) => {
+  const i = ops.findIndex(op => op.kind === 'select' && op.label === parent);
+  if (i !== -1) ops[i].cascade = true;
+  markOptions(child);
+  const res = window.__drp.filters(ops);
+  const reload = i !== -1 && !!res[i];
+  return [res, await window.__drp.waitOption([txt, ms, reload ? child : null])];
+}
+"""
+
+async def wait_for_option(page, text, timeout=8000, reloaded=None) -> bool:
+    """
+    `reloaded`: label of a select marked with markOptions() before its parent
+    changed; then only its reloaded options count.
+    """
+    try:
+        return bool(await page.evaluate("(a) => window.__drp.waitOption(a)", [text, timeout, reloaded]))
+    except Exception:
+        return False
+
+
 async def run_one(context, page, status_text: str, title_prefix: str):
     # Force filters
     circle = "LUDHIANA CANAL CIRCLE"
     division = "FARIDKOT CANAL AND GROUND WATER DIVISION"
 
-    ok_c = await set_select_by_label(page, "Circle Office", circle)
+    # Circle goes first (the Division list is reloaded from it), together
+    # with Nature, which depends on neither; the same call then waits for
+    # the reloaded Division list to include the wanted one
+    try:
+        (ok_c, ok_n), div_ready = await page.evaluate(
+            "(a) => window.__drp.cascade(a)",
+            [[
+                {"kind": "select", "label": "Circle Office", "wanted": circle},
+                {"kind": "selectAll", "label": "Nature Of Application"},
+            ], "Circle Office", "Division Office", division, 8000],
+        )
+    except Exception:
+        ok_c = ok_n = div_ready = False
+    if not ok_c:
+        # No forced `change` here: this path also runs after Circle's change
+        # submitted the form and the cascade call died in the navigation. The
+        # new page has Circle set and Division loaded, and re-firing would
+        # submit again. So only wait for a reload if setting Circle actually
+        # changed its selection
+        try:
+            before = await page.evaluate(
+                "([p, c]) => (window.__drp.markOptions(c), window.__drp.selectedIndex(p))",
+                ["Circle Office", "Division Office"])
+        except Exception:
+            before = -1
+        ok_c = await set_select_by_label(page, "Circle Office", circle)
+        try:
+            changed = ok_c and before != -1 and before != await page.evaluate(
+                "(l) => window.__drp.selectedIndex(l)", "Circle Office")
+        except Exception:
+            changed = False
+        div_ready = ok_c and await wait_for_option(
+            page, division, reloaded="Division Office" if changed else None)
     log(f"[filter] Circle Office → {circle} (ok={ok_c})")
-    # Divisions often load after Circle; small wait helps
-    await asyncio.sleep(0.6)
-    ok_d = await set_select_by_label(page, "Division Office", division)
+    if not div_ready:
+        log(f"[filter] Division list did not (re)load with {division} in time")
+
+    # Dates: 26/07/2024 → today (dd/mm/yyyy)
+    from_str = "26/07/2024"
+    to_str   = ist_today_str("%d/%m/%Y")
+
+    # Everything else in one round-trip; per-control helpers only for misses
+    ok_d, ok_s, ok_f, ok_t = await apply_filters(page, [
+        {"kind": "select", "label": "Division Office", "wanted": division},
+        {"kind": "select", "label": "Status", "wanted": status_text},
+        {"kind": "input", "selectors": FROM_DATE_SELECTORS, "value": from_str},
+        {"kind": "input", "selectors": TO_DATE_SELECTORS, "value": to_str},
+    ])
+    if not ok_d:
+        ok_d = await set_select_by_label(page, "Division Office", division)
     log(f"[filter] Division Office → {division} (ok={ok_d})")
 
-    ok_n = await select_nature_all(page)
+    if not ok_n:
+        ok_n = await select_nature_all(page)
     log(f"[filter] Nature Of Application → Select All (ok={ok_n})")
 
-    ok_s = await set_select_by_label(page, "Status", status_text)
+    if not ok_s:
+        ok_s = await set_select_by_label(page, "Status", status_text)
     log(f"[filter] Status → {status_text} (ok={ok_s})")
 
-    # Dates: 26/07/2024 → today (dd/mm/yyyy)
-    from_str = "26/07/2024"
-    to_str   = ist_today_str("%d/%m/%Y")
-    ok_dt = await set_date_inputs(page, from_str, to_str)
-    log(f"[dates] set From='{from_str}' To='{to_str}' (ok={ok_dt})")
+    ok_dt = bool(ok_f and ok_t)
+    if ok_dt:
+        log(f"[dates] set From='{from_str}' To='{to_str}' → now From='{ok_f}' To='{ok_t}'")
+    else:
+        ok_dt = await set_date_inputs(page, from_str, to_str)
+        log(f"[dates] set From='{from_str}' To='{to_str}' (ok={ok_dt})")
 
     # Show Report and ensure data rows
     ok_show = await click_show_report_and_wait(page)
     if not ok_show:
         # If no rows, still render page so you see “No rows”
         log("[show] No data rows detected; will still render for diagnosis.")
-    await snap(page, f"after_grid_{status_text.lower()}.png")
+    snap(page, f"after_grid_{status_text.lower()}.png")
 
     # Render to PDF from DOM
     stamp = ist_today_str("%d-%m-%Y")
@@ -487,26 +956,74 @@ async def run_one(context, page, status_text: str, title_prefix: str):
     return str(save_path)
 
 
+async def goto_with_backoff(page, url, timeouts=(15000, 45000, 90000), wait_until="domcontentloaded"):
+    """
+    Short first attempt so a healthy server answers fast; longer timeouts only
+    kick in when the previous try actually timed out. Transient network
+    errors (reset, DNS hiccup) are retried too, after a growing pause.
+    """
+    last_err = None
+    for i, t in enumerate(timeouts):
+        try:
+            return await page.goto(url, wait_until=wait_until, timeout=t)
+        except PWTimeout as e:
+            last_err = e
+            log(f"[nav] {url} timed out after {t} ms; retrying…")
+        except PWError as e:
+            if "net::ERR_" not in str(e):
+                raise
+            last_err = e
+            log(f"[nav] {url} failed ({str(e).splitlines()[0]}); retrying…")
+        if i + 1 < len(timeouts):
+            await asyncio.sleep(1 << i)
+    raise last_err
+
+
+# Login field candidates, in priority order; tried one by one, first hit wins
+USER_TYPE_SELECTORS = ["select#usertype", "select#userType", "select[name='userType']", "select#user_type"]
+USERNAME_SELECTORS = ["#username", "input[name='username']", "#login", "#loginid", "input[name='loginid']", "input[name='userid']"]
+PASSWORD_SELECTORS = ["#password", "input[name='password']", "#pwd", "input[name='pwd']"]
+
+_DASHBOARD_RE = re.compile(r"/Authorities/.*dashboard\.jsp")
+
 async def login(context, login_url, username, password, user_type):
-    page = await context.new_page()
+    page = await new_page(context)
     log(f"Opening login page: {login_url}")
-    await page.goto(login_url, wait_until="domcontentloaded", timeout=45000)
+    # domcontentloaded, not commit: the page's own scripts (submit /
+    # validation handlers, user-type change handler) must have run before we
+    # fill and submit the form
+    await goto_with_backoff(page, login_url, wait_until="domcontentloaded")
+    try:
+        # Any candidate will do here (document order is fine for waiting)
+        await page.locator(", ".join(PASSWORD_SELECTORS)).first.wait_for(timeout=15000)
+    except Exception:
+        pass
 
-    # user type (optional)
-    if user_type:
-        for sel in ["select#usertype","select#userType","select[name='userType']","select#user_type"]:
-            try:
-                if await page.locator(sel).count():
-                    try: await page.select_option(sel, value=user_type)
-                    except Exception:
-                        await page.select_option(sel, label=user_type)
-                    break
-            except Exception:
-                pass
+    # user type (optional), username and password in one round-trip
+    # (user type first: its change handler may reset the form)
+    ops = [{"kind": "select", "selectors": USER_TYPE_SELECTORS, "wanted": user_type}] if user_type else []
+    ops += [
+        {"kind": "input", "selectors": USERNAME_SELECTORS, "value": username},
+        {"kind": "input", "selectors": PASSWORD_SELECTORS, "value": password},
+    ]
+    *type_ok, user_ok, pass_ok = await apply_filters(page, ops)
 
-    # username / password
-    await fill_first(page, ["#username","input[name='username']","#login","#loginid","input[name='loginid']","input[name='userid']"], username)
-    await fill_first(page, ["#password","input[name='password']","#pwd","input[name='pwd']"], password)
+    if user_type and not type_ok[0]:
+        try:
+            found = await _present(page, USER_TYPE_SELECTORS)
+            if found:
+                loc = found[0][1]
+                try: await loc.select_option(value=user_type)
+                except Exception:
+                    await loc.select_option(label=user_type)
+        except Exception:
+            pass
+
+    # username / password: Playwright fill for whatever the batch missed
+    if not user_ok:
+        await fill_first(page, USERNAME_SELECTORS, username)
+    if not pass_ok:
+        await fill_first(page, PASSWORD_SELECTORS, password)
 
     # click login
     await click_first(page, [
@@ -514,19 +1031,169 @@ async def login(context, login_url, username, password, user_type):
         "button[type='submit']","[role='button']:has-text('Login')"
     ], timeout=6000, force=True)
 
-    # wait for dashboard or same page but authenticated
+    # wait for dashboard or same page but authenticated. The session cookie
+    # arrives with the redirect's response, so commit is enough: nothing on
+    # the dashboard itself is used (the report page is opened by URL)
+    if not _DASHBOARD_RE.search(page.url):
+        try:
+            await page.wait_for_url(_DASHBOARD_RE, wait_until="commit", timeout=25000)
+        except Exception:
+            pass
+    log("Login complete.")
+    return page
+
+
+# Installed once per context so each call ships a function name, not its source
+PAGE_HELPERS_JS = f"""
+(() => {{
+{LABEL_INDEX_JS}
+window.__drp = {{
+  selectByText: (label, text, css) => {{ const s = selectNear(label, css); return !!s && pickOption(s, text); }},
+  selectAll: (label, css) => {{ const s = selectNear(label, css); return !!s && selectAllOptions(s); }},
+  fire,
+  filters: {FILTERS_JS},
+  bsPick: {BS_PICK_JS},
+  bsPickClosed: {BS_PICK_CLOSED_JS},
+  bsPickAll: {BS_PICK_ALL_JS},
+  emptyMsg: {EMPTY_MSG_JS},
+  reportState: {REPORT_STATE_JS},
+  armReport: {ARM_REPORT_JS},
+  waitReport: {WAIT_REPORT_JS},
+  waitQuiet: {WAIT_QUIET_JS},
+  optionPresent: {OPTION_PRESENT_JS},
+  waitOption: {WAIT_OPTION_JS},
+  cascade: {CASCADE_JS},
+  markOptions,
+  selectedIndex: (label) => {{ const s = selectNear(label); return s ? s.selectedIndex : -1; }},
+  controlKind: {CONTROL_KIND_JS},
+  kindNear: (text) => {{ const l = labelFor(text); return l ? window.__drp.controlKind(l) : false; }},
+  reportFormReady: {REPORT_FORM_READY_JS},
+  extractTables: {EXTRACT_TABLES_JS},
+}};
+}})();
+"""
+
+# Fonts/images plus media, subtitle and manifest files by extension
+BLOCKED_EXTS = ("png", "jpg", "jpeg", "gif", "svg", "ico", "webp", "woff", "woff2", "ttf", "otf",
+                "mp3", "mp4", "webm", "vtt", "webmanifest")
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "hotjar.com",
+    "facebook.net", "nr-data.net", "newrelic.com", "clarity.ms",
+)
+# Chromium's own URL blocklist (wildcards only), with and without a query
+BLOCKED_URL_PATTERNS = (
+    [p for ext in BLOCKED_EXTS for p in (f"*.{ext}", f"*.{ext}?*")]
+    + [f"*{host}/*" for host in BLOCKED_HOSTS]
+)
+# Route fallback for when CDP isn't available
+BLOCKED_ASSET_GLOB = "**/*.{" + ",".join(BLOCKED_EXTS) + "}"
+# One scan per request URL instead of one substring test per host
+_BLOCKED_HOST_RE = re.compile("|".join(map(re.escape, BLOCKED_HOSTS)), re.IGNORECASE)
+
+def _block(route):
+    # Reported as blocked-by-client: page scripts treat it as an ad-blocker
+    # style refusal rather than a network failure worth retrying
+    return route.abort("blockedbyclient")
+
+DEFAULT_TIMEOUT_MS = 2000
+
+async def new_context(browser, storage_state=None):
+    context = await browser.new_context(storage_state=storage_state)
+    # Anything without its own timeout is a quick action on an element we
+    # already found; fail fast instead of Playwright's 30 s. Navigations and
+    # the real waits all pass explicit, longer timeouts
+    context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+    await context.add_init_script(script=PAGE_HELPERS_JS)
+    return context
+
+async def new_page(context):
+    """
+    Opens a page with static assets and analytics blocked by the browser
+    itself (Network.setBlockedURLs): no request interception at all, so
+    nothing per request round-trips to the driver or Python. Keeps css/js so
+    widgets (bootstrap-select menus, datepickers) still lay out and work.
+    """
+    page = await context.new_page()
+    try:
+        cdp = await context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        await cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception:
+        await page.route(_BLOCKED_HOST_RE, _block)
+        await page.route(BLOCKED_ASSET_GLOB, _block)
+    return page
+
+
+def _session_cookies_expired() -> bool:
+    """
+    True once any persistent cookie in the snapshot has passed its expiry
+    (session cookies carry expires=-1 and are left to the probe).
+    """
     try:
-        await page.wait_for_url(re.compile(r".*/Authorities/.*dashboard\.jsp.*"), timeout=25000)
+        cookies = json.loads(SESSION_FILE.read_text(encoding="utf-8")).get("cookies", [])
     except Exception:
-        pass
+        return False  # unreadable: new_context() below reports and drops it
+    now = datetime.now().timestamp()
+    return any(0 < c.get("expires", -1) < now for c in cookies)
 
-    # If still on signup, but we might be logged-in and redirected later; wait a little
-    await page.wait_for_load_state("domcontentloaded")
-    log("Login complete.")
-    return page
+
+async def restore_session(browser):
+    """
+    Returns (context, page) opened from the saved storage_state and already
+    sitting on the report page if the server still accepts it, else None.
+    """
+    try:
+        age = datetime.now().timestamp() - SESSION_FILE.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    if age > SESSION_MAX_AGE_S or _session_cookies_expired():
+        log("[session] Saved login is stale; logging in again.")
+        SESSION_FILE.unlink(missing_ok=True)
+        return None
+    try:
+        context = await new_context(browser, str(SESSION_FILE))
+    except Exception:
+        # Unreadable / corrupt snapshot
+        SESSION_FILE.unlink(missing_ok=True)
+        return None
+    try:
+        page = await new_page(context)
+        await page.goto(REPORT_URL, wait_until="domcontentloaded", timeout=45000)
+        # Expired sessions bounce back to signup.jsp
+        if not _APP_WISE_RE.search(page.url):
+            log("[session] Saved login expired; logging in again.")
+            SESSION_FILE.unlink(missing_ok=True)
+            await context.close()
+            return None
+        # Write back refreshed cookies so the next run starts from them
+        await context.storage_state(path=str(SESSION_FILE))
+        return context, page
+    except Exception:
+        await context.close()
+        return None
+
+
+async def run_report(page, status_text: str, title_prefix: str):
+    # Each report gets its own page in the shared context, so the two runs
+    # overlap their server-side waits while sharing cookies and HTTP cache
+    try:
+        await goto_report_page(page, f"_{status_text.lower()}")
+        path = await run_one(page.context, page, status_text, title_prefix)
+        log(f"Saved {Path(path).name}")
+        return path
+    except Exception:
+        await snap_failure(page, f"fail_{status_text.lower()}")
+        raise
+    finally:
+        await flush_snaps()
+        await page.close()
 
 
-async def site_login_and_download():
+async def site_login_and_download(deliver=None):
+    """
+    Produces both report PDFs and returns their paths. `deliver(paths)`, if
+    given, starts as soon as they exist, overlapping browser shutdown.
+    """
     login_url = "https://esinchai.punjab.gov.in/signup.jsp"
     username  = require_env("USERNAME")
     password  = require_env("PASSWORD")
@@ -535,74 +1202,175 @@ async def site_login_and_download():
     async with async_playwright() as pw:
         browser = await pw.chromium.launch(
             headless=True,
-            args=[
-                "--no-sandbox","--disable-dev-shm-usage","--disable-extensions",
-                "--disable-background-networking","--disable-client-side-phishing-detection",
-                "--disable-default-apps","--disable-hang-monitor",
-                "--disable-ipc-flooding-protection","--disable-popup-blocking",
-                "--disable-prompt-on-repost","--no-first-run",
-            ],
+            # Playwright already passes the usual --disable-* / --no-first-run
+            # switches. No --single-process: the two report pages run
+            # side by side and need their own renderer processes
+            # No GPU in CI: skip the SwiftShader fallback process too
+            args=["--no-sandbox", "--no-zygote", "--disable-gpu", "--disable-software-rasterizer"],
+        )
+
+        # Reuse the last run's session, else log in. Either way we end up with
+        # one authenticated context and a warm page for DELAYED
+        restored = await restore_session(browser)
+        if restored:
+            log("[session] Reusing saved login.")
+            context, first_page = restored
+        else:
+            context = await new_context(browser)
+            first_page = await login(context, login_url, username, password, user_type)
+            await context.storage_state(path=str(SESSION_FILE))
+
+        # DELAYED and PENDING run concurrently, one page each. Let both
+        # finish (and save their failure snapshots) before the browser goes
+        # away, then surface the first error
+        results = await asyncio.gather(
+            run_report(first_page, "DELAYED", "Delayed Apps"),
+            run_report(await new_page(context), "PENDING", "Pending Apps"),
+            return_exceptions=True,
         )
-        context = await browser.new_context(accept_downloads=True)
-        # Block only fonts for speed; keep css/js/img so widgets work
-        async def speed_filter(route, request):
-            if request.resource_type in ("font",):
-                await route.abort()
-            else:
-                await route.continue_()
-        await context.route("**/*", speed_filter)
 
-        # Login
-        page = await login(context, login_url, username, password, user_type)
+        failed = next((r for r in results if isinstance(r, BaseException)), None)
+        sending = asyncio.create_task(deliver(results)) if deliver and not failed else None
+        try:
+            # Cookies may have rotated during the run; keep the newest for next time
+            if not failed:
+                try: await context.storage_state(path=str(SESSION_FILE))
+                except Exception: pass
+
+            await context.close()
+            await browser.close()
+        finally:
+            # Even if closing fails, the upload must finish (and log) first
+            if sending:
+                await sending
 
-        # Go to report page
-        await goto_report_page(page)
+    if failed:
+        raise failed
+    return results
 
-        # DELAYED
-        delayed = await run_one(context, page, "DELAYED", "Delayed Apps")
-        log(f"Saved {Path(delayed).name}")
 
-        # Navigate fresh for PENDING (same page is fine; we’ll re-apply)
-        await goto_report_page(page)
-        pending = await run_one(context, page, "PENDING", "Pending Apps")
-        log(f"Saved {Path(pending).name}")
+# ---------- Telegram ----------
+TG_READ_BUFFER = 1 << 20
+# Telegram caps bot uploads at 50 MB; anything slower than this is stuck
+TG_UPLOAD_TIMEOUT_S = 120
+
+# Only statuses that mean the upload was not taken are retried: a rate limit
+# (429, with retry_after) or the server turning the request away (503).
+# sendDocument/sendMediaGroup aren't idempotent, and a 500/502/504 can come
+# after the file was posted, so a re-POST could post it twice
+TG_RETRY_STATUS = {429, 503}
+TG_ATTEMPTS = 3
+
+async def _tg_post(session, url, fields, files):
+    """
+    POSTs a multipart form, re-opening `files` ({field: path}) per attempt
+    since a sent FormData can't be replayed. Returns (HTTP status, body);
+    200 is success.
+    """
+    for attempt in range(TG_ATTEMPTS):
+        with ExitStack() as stack:
+            data = aiohttp.FormData()
+            for k, v in fields.items():
+                data.add_field(k, v)
+            for k, p in files.items():
+                # aiohttp streams the open file in 64 KiB reads off the event
+                # loop; a 1 MiB buffer turns those into one read() per MiB
+                f = stack.enter_context(open(p, "rb", buffering=TG_READ_BUFFER))
+                data.add_field(k, f, filename=Path(p).name, content_type="application/pdf")
+            async with session.post(url, data=data) as r:
+                if r.status == 200:
+                    return 200, ""
+                body = await r.text()
+                if r.status not in TG_RETRY_STATUS or attempt + 1 == TG_ATTEMPTS:
+                    return r.status, body
+                delay = 0.5 * (1 << attempt)
+                if r.status == 429:
+                    try: delay = float(json.loads(body)["parameters"]["retry_after"])
+                    except Exception: pass
+        log(f"[tg] HTTP {r.status}; retrying in {delay:g}s")
+        await asyncio.sleep(delay)
 
-        await context.close(); await browser.close()
 
-    return [delayed, pending]
+async def _tg_send_one(session, api, chat, p):
+    status, err = await _tg_post(session, f"{api}/sendDocument", {"chat_id": chat}, {"document": p})
+    if status == 200:
+        log(f"[tg] sent {Path(p).name}")
+    else:
+        log(f"[tg] send failed for {p}: {err}")
+
+
+async def _tg_send_group(session, api, chat, files) -> bool:
+    """
+    Sends 2-10 documents as one album in a single multipart request.
+    Returns False only when Telegram rejected the album outright (a 4xx
+    other than 429): the one failure after which sending the files one by
+    one can't post them twice.
+    """
+    media = [{"type": "document", "media": f"attach://doc{i}"} for i in range(len(files))]
+    status, err = await _tg_post(
+        session, f"{api}/sendMediaGroup",
+        {"chat_id": chat, "media": json.dumps(media)},
+        {f"doc{i}": p for i, p in enumerate(files)},
+    )
+    if status != 200:
+        log(f"[tg] sendMediaGroup failed: HTTP {status} {err}")
+        return not (400 <= status < 500 and status != 429)
+    log(f"[tg] sent {', '.join(Path(p).name for p in files)}")
+    return True
 
 
-# ---------- Telegram ----------
 async def send_via_telegram(files):
     bot = os.getenv("TELEGRAM_BOT_TOKEN"); chat = os.getenv("TELEGRAM_CHAT_ID")
     if not bot or not chat:
         log("[tg] TELEGRAM_BOT_TOKEN/TELEGRAM_CHAT_ID not set; skipping Telegram."); return
-    import requests
-    for p in files:
-        with open(p, "rb") as f:
-            r = requests.post(
-                f"https://api.telegram.org/bot{bot}/sendDocument",
-                data={"chat_id": chat},
-                files={"document": (Path(p).name, f, "application/pdf")}
-            )
-        if r.status_code != 200:
-            log(f"[tg] send failed for {p}: {r.text}")
-        else:
-            log(f"[tg] sent {Path(p).name}")
+    api = f"https://api.telegram.org/bot{bot}"
+    timeout = aiohttp.ClientTimeout(total=TG_UPLOAD_TIMEOUT_S)
+    # One keep-alive pool for every upload and retry (the fallback sends
+    # both files at once, so two connections)
+    connector = aiohttp.TCPConnector(limit=4, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        # Both reports in one request when Telegram allows an album (2-10 docs)
+        if 2 <= len(files) <= 10:
+            try:
+                if await _tg_send_group(session, api, chat, files):
+                    return
+            except Exception as e:
+                # A timeout or dropped connection can come after Telegram
+                # took the upload; re-sending per file could post it twice
+                log(f"[tg] sendMediaGroup error: {e}; not re-sending")
+                return
+            log("[tg] falling back to one sendDocument per file")
+        # One session → one pooled TLS connection; uploads go out together
+        results = await asyncio.gather(
+            *[_tg_send_one(session, api, chat, p) for p in files],
+            return_exceptions=True,
+        )
+    # One failed upload shouldn't tear down the other mid-flight
+    for p, res in zip(files, results):
+        if isinstance(res, Exception):
+            log(f"[tg] send failed for {p}: {res}")
 
 
 # ---------- Entry ----------
-async def main():
-    files = await site_login_and_download()
+async def deliver(files):
     log("Downloads complete: " + ", ".join([Path(f).name for f in files]))
     try:
         await send_via_telegram(files)
     except Exception as e:
         log(f"[tg] error (continuing): {e}")
 
+async def main():
+    # Uploads start while the browser is still closing
+    await site_login_and_download(deliver)
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        # libuv loop when available: cheaper per-callback overhead on the
+        # many small Playwright round-trips
+        if uvloop:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except Exception as e:
         traceback.print_exc()
         sys.exit(1)